@@ -0,0 +1,275 @@
+import argparse
+import importlib
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+BACKENDS = {
+    'python': 'chess_game',
+    'lua': 'chess_game_from_lua',
+}
+
+# Sub-microsecond calls are looped until one sample lasts at least this long
+MIN_SAMPLE_TIME = 0.005
+# These are compared on their min, which is less sensitive to timer noise
+MICRO_BENCHMARKS = {'get_board', 'bridge_call'}
+
+
+def _legal_moves(game):
+    """All legal moves of the side to move, using only the API both backends share"""
+    current_player = game.get_current_player()
+    # Sorted, so the order doesn't depend on how a backend generates moves
+    return [(pos, to_pos) for pos, piece in sorted(game.get_board().items())
+            if piece[0] == current_player
+            for to_pos in sorted(game.get_valid_moves(pos))]
+
+
+def make_workload(seed=0, num_games=20, max_moves=60):
+    """Fixed, seeded move sequences played on the Python implementation"""
+    from chess_game import Chess
+    rng = random.Random(seed)
+    sequences = []
+    for _ in range(num_games):
+        game = Chess()
+        moves = []
+        for _ in range(max_moves):
+            legal_moves = _legal_moves(game)
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            game.make_move(*move)
+            moves.append(move)
+        sequences.append(moves)
+    return sequences
+
+
+def validate_workload(Chess, sequences):
+    """Replay the workload on a backend, return an error message if it diverges"""
+    for game_num, moves in enumerate(sequences):
+        game = Chess()
+        for move_num, move in enumerate(moves):
+            if not game.make_move(*move):
+                return f"game {game_num + 1} move {move_num + 1} {move} was rejected"
+    return None
+
+
+class BackendBenchmark:
+    """Time the shared Chess API of one backend on a fixed workload"""
+
+    def __init__(self, Chess, sequences, random_games, position_step=5):
+        self.Chess = Chess
+        self.sequences = sequences
+        self.random_games = random_games
+        self.position_step = position_step
+        self._position_cache = None
+        self._loops = {}
+
+    def _positions(self):
+        """Games set up at every position_step-th ply of the workload"""
+        # None of the position benchmarks change the games, so they are built once
+        if self._position_cache is not None:
+            return self._position_cache
+        positions = []
+        for moves in self.sequences:
+            for length in range(0, len(moves), self.position_step):
+                game = self.Chess()
+                for move in moves[:length]:
+                    game.make_move(*move)
+                positions.append(game)
+        self._position_cache = positions
+        return positions
+
+    def _time_micro(self, name, call):
+        """Time call on every position, looping until a sample lasts MIN_SAMPLE_TIME.
+
+        The loop count is calibrated on the first sample (normally the
+        warmup) and then kept fixed so every repeat does the same work.
+        """
+        positions = self._positions()
+        loops = self._loops.get(name, 1)
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                for game in positions:
+                    call(game)
+            elapsed = time.perf_counter() - start
+            if name in self._loops or elapsed >= MIN_SAMPLE_TIME:
+                self._loops[name] = loops
+                return elapsed, loops * len(positions)
+            loops *= 2
+
+    def bench_make_move(self):
+        games = [self.Chess() for _ in self.sequences]
+        start = time.perf_counter()
+        for game, moves in zip(games, self.sequences):
+            for from_pos, to_pos in moves:
+                game.make_move(from_pos, to_pos)
+        return time.perf_counter() - start, sum(len(moves) for moves in self.sequences)
+
+    def bench_get_valid_moves(self):
+        positions = self._positions()
+        squares = [[pos for pos, piece in game.get_board().items()
+                    if piece[0] == game.get_current_player()] for game in positions]
+        start = time.perf_counter()
+        for game, own_squares in zip(positions, squares):
+            for pos in own_squares:
+                game.get_valid_moves(pos)
+        return time.perf_counter() - start, sum(len(own_squares) for own_squares in squares)
+
+    def bench_is_game_over(self):
+        positions = self._positions()
+        start = time.perf_counter()
+        for game in positions:
+            game.is_game_over()
+        return time.perf_counter() - start, len(positions)
+
+    def bench_get_board(self):
+        return self._time_micro('get_board', lambda game: game.get_board())
+
+    def bench_bridge_call(self):
+        # Cheapest call in the API, mostly measures the Lua bridge overhead
+        return self._time_micro('bridge_call', lambda game: game.get_current_player())
+
+    def bench_random_game(self):
+        # Replays pre-generated random games, generating the legal moves at
+        # every ply like a random player would, so all backends play the same games
+        start = time.perf_counter()
+        for moves in self.random_games:
+            game = self.Chess()
+            for move in moves:
+                _legal_moves(game)
+                game.make_move(*move)
+        return time.perf_counter() - start, len(self.random_games)
+
+    def run(self, name, repeats=5, warmup=1):
+        """Return per-operation timing statistics in seconds for one benchmark"""
+        bench = getattr(self, f"bench_{name}")
+        for _ in range(warmup):
+            bench()
+        samples = []
+        ops = 0
+        for _ in range(repeats):
+            elapsed, ops = bench()
+            samples.append(elapsed / ops)
+        return {
+            'ops': ops,
+            'repeats': repeats,
+            'min': min(samples),
+            'median': statistics.median(samples),
+            'mean': statistics.mean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'ops_per_second': 1 / statistics.median(samples),
+        }
+
+
+BENCHMARKS = ['make_move', 'get_valid_moves', 'is_game_over', 'get_board', 'bridge_call', 'random_game']
+
+
+def run_benchmarks(backends, repeats=5, warmup=1, seed=0, benchmarks=BENCHMARKS):
+    sequences = make_workload(seed)
+    random_games = make_workload(seed + 1, num_games=3)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeats': repeats,
+            'warmup': warmup,
+        },
+        'results': {},
+    }
+
+    for backend in backends:
+        try:
+            Chess = importlib.import_module(BACKENDS[backend]).Chess
+        except Exception as e:
+            print(f"Skipping {backend} backend: {e}")
+            continue
+        error = validate_workload(Chess, sequences) or validate_workload(Chess, random_games)
+        if error:
+            print(f"Skipping {backend} backend: workload diverged, {error}")
+            continue
+        benchmark = BackendBenchmark(Chess, sequences, random_games)
+        results['results'][backend] = {}
+        print(f"\n{backend}:")
+        for name in benchmarks:
+            stats = benchmark.run(name, repeats, warmup)
+            results['results'][backend][name] = stats
+            print(f"  {name:<16} {stats['median'] * 1e6:12.3f} us/op  "
+                  f"(min {stats['min'] * 1e6:.3f}, stdev {stats['stdev'] * 1e6:.3f}, "
+                  f"{stats['ops_per_second']:.1f} ops/s)")
+    return results
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """Print a comparison of timings against a baseline.
+
+    Returns (regressions, missing): benchmarks slower than the threshold
+    as (backend, name, change), and baseline benchmarks absent from the
+    current results as (backend, name).
+    """
+    regressions = []
+    missing = []
+    for backend, benchmarks in baseline['results'].items():
+        for name, base in benchmarks.items():
+            stats = current['results'].get(backend, {}).get(name)
+            if stats is None:
+                missing.append((backend, name))
+                print(f"{backend:<8} {name:<16} MISSING")
+                continue
+            stat = 'min' if name in MICRO_BENCHMARKS else 'median'
+            change = stats[stat] / base[stat] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append((backend, name, change))
+            print(f"{backend:<8} {name:<16} {base[stat] * 1e6:12.3f} -> "
+                  f"{stats[stat] * 1e6:12.3f} us/op ({stat:<6}) {change:+7.1%}{flag}")
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python and Lua chess implementations")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="run the benchmark suite")
+    run.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=list(BACKENDS))
+    run.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=BENCHMARKS)
+    run.add_argument('--repeats', type=int, default=5)
+    run.add_argument('--warmup', type=int, default=1)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--output', help="write results as JSON to this file")
+
+    compare = subparsers.add_parser('compare', help="compare results against a saved baseline")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help="relative slowdown (of the min for micro benchmarks, the median "
+                              "otherwise) that counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_benchmarks(args.backends, args.repeats, args.warmup, args.seed, args.benchmarks)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions, missing = compare_results(baseline, current, args.threshold)
+    if missing:
+        print(f"\n{len(missing)} benchmark(s) missing from {args.current}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+    if missing or regressions:
+        sys.exit(1)
+    print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
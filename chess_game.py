@@ -1,3 +1,26 @@
+PIECE_CODES = {
+    ('white', 'p'): 1, ('white', 'n'): 2, ('white', 'b'): 3,
+    ('white', 'r'): 4, ('white', 'q'): 5, ('white', 'k'): 6,
+    ('black', 'p'): 7, ('black', 'n'): 8, ('black', 'b'): 9,
+    ('black', 'r'): 10, ('black', 'q'): 11, ('black', 'k'): 12
+}
+
+def encode_board(board):
+    """Encode a board dict as 64 bytes, row-major from (0, 0)"""
+    squares = bytearray(64)
+    for (row, col), piece in board.items():
+        squares[row * 8 + col] = PIECE_CODES[piece]
+    return bytes(squares)
+
+def pack_move(from_pos, to_pos):
+    """Pack a (from, to) move into a single integer (from_square * 64 + to_square)"""
+    return (from_pos[0] * 8 + from_pos[1]) * 64 + to_pos[0] * 8 + to_pos[1]
+
+def unpack_move(move):
+    """Inverse of pack_move"""
+    from_square, to_square = divmod(move, 64)
+    return divmod(from_square, 8), divmod(to_square, 8)
+
 class Chess:
     def __init__(self):
         self.board = self._initial_board()
@@ -144,6 +167,14 @@ class Chess:
         if pos not in self.board or self.board[pos][0] != self.current_player:
             return []
         return self._get_piece_moves(pos)
+
+    def get_all_valid_moves(self):
+        moves = []
+        for pos, piece in list(self.board.items()):
+            if piece[0] == self.current_player:
+                for to_pos in self._get_piece_moves(pos):
+                    moves.append((pos, to_pos))
+        return moves
     
     def get_current_player(self):
         return self.current_player
@@ -166,11 +197,26 @@ class Chess:
     def get_last_move(self):
         return self.last_move
 
+    def get_castling_rights(self):
+        return self.castling_rights
+
+
+    def copy(self):
+        game = Chess.__new__(Chess)
+        game.board = self.board.copy()
+        game.current_player = self.current_player
+        game.last_move = self.last_move
+        game.castling_rights = {color: rights.copy() for color, rights in self.castling_rights.items()}
+        return game
 
     def make_move(self, from_pos, to_pos):
         if to_pos not in self.get_valid_moves(from_pos):
             return False
+        self._apply_move(from_pos, to_pos)
+        return True
 
+    def _apply_move(self, from_pos, to_pos):
+        # Apply a move already known to be legal
         piece = self.board[from_pos]
         
         # Handle castling
@@ -210,8 +256,6 @@ class Chess:
         
         # Switch players
         self.current_player = 'black' if self.current_player == 'white' else 'white'
-        
-        return True
 
     def is_game_over(self):
         # Create a list of positions and pieces before iterating
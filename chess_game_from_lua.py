@@ -55,7 +55,16 @@ class Chess:
         return valid_moves
     
     def get_last_move(self):
-        return self.game.last_move
+        if self.game.last_move is None:
+            return None
+        color, piece, from_pos, to_pos = list(dict(self.game.last_move).values())
+        from_pos = list(dict(from_pos).values())
+        to_pos = list(dict(to_pos).values())
+        return (color, piece, (from_pos[0] - LUA_INDEX, from_pos[1] - LUA_INDEX),
+                (to_pos[0] - LUA_INDEX, to_pos[1] - LUA_INDEX))
+
+    def get_castling_rights(self):
+        return {color: dict(rights) for color, rights in dict(self.game.castling_rights).items()}
     
     def _is_check(self, color):
         return self.game._is_check(self.game, color)
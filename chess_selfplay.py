@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import random
+import struct
+import threading
+import time
+from multiprocessing import Pool
+from chess_game import Chess, encode_board, pack_move
+from chess_uci import SearchLimits, Searcher
+
+# One training sample: 64 piece codes, side to move, packed move, outcome
+# (+1 white won, -1 black won, 0 draw/unfinished)
+SAMPLE_FORMAT = struct.Struct('<64sBHb')
+SAMPLE_SIZE = SAMPLE_FORMAT.size
+
+PROGRESS_FILE = 'progress.json'
+
+ENGINE_DEPTH = 2
+# Share of engine moves replaced by a random move, so games differ
+ENGINE_RANDOM_MOVES = 0.1
+
+
+def decode_sample(data):
+    """Decode one packed sample into (board_bytes, side, move, outcome)"""
+    return SAMPLE_FORMAT.unpack(data)
+
+
+def random_policy(game, moves, rng):
+    """Pick a uniformly random legal move"""
+    return rng.choice(moves)
+
+
+def engine_policy(game, moves, rng):
+    """Pick the move of a depth-limited search of the built-in engine"""
+    if rng.random() < ENGINE_RANDOM_MOVES:
+        return rng.choice(moves)
+    return Searcher(game.copy(), SearchLimits(depth=ENGINE_DEPTH), threading.Event()).search()
+
+
+# A policy takes (game, legal moves, rng) and must return one of the legal moves
+POLICIES = {
+    'random': random_policy,
+    'engine': engine_policy,
+}
+
+
+def play_game(game_index, seed, policy='random', max_moves=200):
+    """Play one self-play game and return its samples packed as bytes"""
+    rng = random.Random(seed * 1000003 + game_index)
+    choose_move = POLICIES[policy] if isinstance(policy, str) else policy
+    game = Chess()
+    positions = []
+
+    for _ in range(max_moves):
+        moves = game.get_all_valid_moves()
+        if not moves:
+            break
+        from_pos, to_pos = choose_move(game, moves, rng)
+        side = 0 if game.get_current_player() == 'white' else 1
+        positions.append((encode_board(game.get_board()), side, pack_move(from_pos, to_pos)))
+        # The move comes from the legal moves, no need for make_move to check it again
+        game._apply_move(from_pos, to_pos)
+
+    outcome = 0
+    if game.is_game_over() == 'checkmate':
+        outcome = -1 if game.get_current_player() == 'white' else 1
+
+    return b''.join(SAMPLE_FORMAT.pack(board, side, move, outcome)
+                    for board, side, move in positions)
+
+
+def _play_game_task(args):
+    return args[0], play_game(*args)
+
+
+def generate_games(num_games, seed=0, policy='random', max_moves=200,
+                   workers=None, start=0, batch_size=64):
+    """Yield (game_index, packed_samples) in game order.
+
+    Games are submitted to the pool in bounded batches so the number of
+    finished-but-unconsumed games never grows with num_games.
+    """
+    if workers == 1:
+        for game_index in range(start, num_games):
+            yield game_index, play_game(game_index, seed, policy, max_moves)
+        return
+
+    with Pool(workers) as pool:
+        for batch_start in range(start, num_games, batch_size):
+            batch_end = min(batch_start + batch_size, num_games)
+            tasks = [(i, seed, policy, max_moves) for i in range(batch_start, batch_end)]
+            for result in pool.imap(_play_game_task, tasks):
+                yield result
+
+
+class ShardWriter:
+    """Write packed samples into size-limited shard files with resumable progress.
+
+    A shard is written to a temporary file and only renamed into place,
+    together with a progress update, once it is complete. Resuming
+    replays the games of the unfinished shard, which is deterministic
+    because every game is seeded from its index. A single game larger
+    than the limit gets a shard of its own.
+
+    params describe how the samples are generated. They are stored in the
+    progress file and resuming with different params raises ValueError,
+    so one output directory never mixes sample distributions.
+    """
+
+    def __init__(self, output_dir, shard_size=64 * 1024 * 1024, params=None):
+        self.output_dir = output_dir
+        self.max_samples = max(1, shard_size // SAMPLE_SIZE)
+        os.makedirs(output_dir, exist_ok=True)
+        self.progress = self._load_progress()
+        params = dict(params or {}, shard_size=shard_size)
+        if self.progress['games_done'] and self.progress.get('params') != params:
+            raise ValueError(f"{output_dir} was generated with {self.progress.get('params')}, "
+                             f"refusing to resume with {params}")
+        self.progress['params'] = params
+        self.games_done = self.progress['games_done']
+        self.shard_index = len(self.progress['shards'])
+        self._file = None
+        self._samples_in_shard = 0
+
+    def _load_progress(self):
+        path = os.path.join(self.output_dir, PROGRESS_FILE)
+        if os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        return {'games_done': 0, 'samples': 0, 'shards': []}
+
+    def _save_progress(self):
+        path = os.path.join(self.output_dir, PROGRESS_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.progress, file, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def _shard_path(self):
+        return os.path.join(self.output_dir, f"shard-{self.shard_index:05d}.bin")
+
+    def write_game(self, game_index, data):
+        samples = len(data) // SAMPLE_SIZE
+        # Shards end on game boundaries so a resume never duplicates samples
+        if self._samples_in_shard and self._samples_in_shard + samples > self.max_samples:
+            self._close_shard()
+        if self._file is None:
+            self._file = open(self._shard_path() + '.tmp', 'wb')
+        self._file.write(data)
+        self._samples_in_shard += samples
+        self.games_done = game_index + 1
+
+    def _close_shard(self):
+        self._file.close()
+        os.replace(self._shard_path() + '.tmp', self._shard_path())
+        self.progress['shards'].append(os.path.basename(self._shard_path()))
+        self.progress['samples'] += self._samples_in_shard
+        self.progress['games_done'] = self.games_done
+        self._save_progress()
+        self.shard_index += 1
+        self._file = None
+        self._samples_in_shard = 0
+
+    def close(self):
+        if self._file is not None:
+            self._close_shard()
+        else:
+            self.progress['games_done'] = self.games_done
+            self._save_progress()
+
+
+def read_samples(output_dir):
+    """Stream decoded samples from all completed shards"""
+    with open(os.path.join(output_dir, PROGRESS_FILE)) as file:
+        shards = json.load(file)['shards']
+    for shard in shards:
+        with open(os.path.join(output_dir, shard), 'rb') as file:
+            while True:
+                data = file.read(SAMPLE_SIZE)
+                if len(data) < SAMPLE_SIZE:
+                    break
+                yield decode_sample(data)
+
+
+def run_selfplay(output_dir, num_games, seed=0, policy='random', max_moves=200,
+                 workers=None, shard_size=64 * 1024 * 1024):
+    """Generate num_games self-play games into output_dir, resuming if possible"""
+    params = {
+        'seed': seed,
+        'policy': policy if isinstance(policy, str) else policy.__name__,
+        'max_moves': max_moves,
+    }
+    writer = ShardWriter(output_dir, shard_size, params)
+    # Games of a partially written shard are regenerated from scratch
+    start = writer.games_done
+    if start >= num_games:
+        print(f"Nothing to do: {start} games already generated")
+        return writer.progress
+    if start:
+        print(f"Resuming from game {start}")
+
+    start_time = time.time()
+    samples = 0
+    for game_index, data in generate_games(num_games, seed, policy, max_moves,
+                                           workers, start):
+        writer.write_game(game_index, data)
+        samples += len(data) // SAMPLE_SIZE
+        games = game_index + 1 - start
+        if games % 100 == 0:
+            duration = time.time() - start_time
+            print(f"{game_index + 1}/{num_games} games, {games/duration:.1f} games/s, "
+                  f"{samples/duration:.1f} samples/s")
+    writer.close()
+
+    duration = time.time() - start_time
+    games = num_games - start
+    print(f"\nSelf-play completed!")
+    print(f"Games generated: {games}")
+    print(f"Samples written: {samples}")
+    print(f"Data written: {samples * SAMPLE_SIZE / 1e6:.1f} MB")
+    print(f"Shards: {len(writer.progress['shards'])}")
+    print(f"Time taken: {duration:.2f} seconds")
+    print(f"Games per second: {games/duration:.1f}")
+    print(f"Samples per second: {samples/duration:.1f}")
+    return writer.progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate self-play training samples")
+    parser.add_argument('output_dir')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--max-moves', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-mb', type=float, default=64)
+    args = parser.parse_args()
+
+    try:
+        run_selfplay(args.output_dir, args.games, args.seed, args.policy, args.max_moves,
+                     args.workers, int(args.shard_mb * 1024 * 1024))
+    except ValueError as e:
+        print(e)
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 import pytest
-from chess_game import Chess
+import random
+import threading
+from chess_benchmark import BackendBenchmark, _legal_moves, compare_results, make_workload, validate_workload
+from chess_game import Chess, pack_move, unpack_move
+from chess_selfplay import SAMPLE_SIZE, ShardWriter, decode_sample, play_game, read_samples
+from chess_trace import GAME_HEADER, MAGIC, PLY, record_corpus, record_shard, replay_shard
+import chess_uci
+from chess_uci import SearchLimits, Searcher, UCIEngine, game_from_fen
 
 @pytest.fixture
 def empty_game():
@@ -185,4 +192,256 @@ class TestChess:
         valid_moves = new_game.get_valid_moves((1, 0))
         assert (0, 1) in valid_moves  # Can capture attacking rook
         assert (0, 0) not in valid_moves  # Can't move to king's square
-        assert (2, 1) not in valid_moves  # Can't move leaving king unprotected
\ No newline at end of file
+        assert (2, 1) not in valid_moves  # Can't move leaving king unprotected
+
+    def test_all_valid_moves(self, new_game):
+        moves = new_game.get_all_valid_moves()
+        assert len(moves) == 20  # 16 pawn moves and 4 knight moves
+        assert ((6, 4), (4, 4)) in moves
+
+    def test_pack_move(self):
+        packed = {pack_move((r1, c1), (r2, c2)) for r1 in range(8) for c1 in range(8)
+                  for r2 in range(8) for c2 in range(8)}
+        assert len(packed) == 64 * 64
+        assert unpack_move(pack_move((6, 4), (4, 4))) == ((6, 4), (4, 4))
+
+class TestSelfPlay:
+    SHARD_SIZE = 25 * SAMPLE_SIZE
+
+    def _games(self, num_games):
+        return [play_game(i, seed=0, max_moves=10) for i in range(num_games)]
+
+    def _write(self, output_dir, games):
+        writer = ShardWriter(output_dir, self.SHARD_SIZE, {'seed': 0})
+        for game_index in range(len(games)):
+            writer.write_game(game_index, games[game_index])
+        return writer
+
+    def _shards(self, output_dir):
+        return {path.name: path.read_bytes() for path in sorted(output_dir.glob('shard-*.bin'))}
+
+    def test_shards_end_on_game_boundaries(self, tmp_path):
+        games = self._games(5)
+        self._write(tmp_path, games).close()
+
+        shards = self._shards(tmp_path)
+        assert list(shards.values()) == [games[0] + games[1], games[2] + games[3], games[4]]
+        assert all(len(data) <= self.SHARD_SIZE for data in shards.values())
+
+    def test_read_samples(self, tmp_path):
+        games = self._games(3)
+        self._write(tmp_path, games).close()
+
+        data = b''.join(games)
+        expected = [decode_sample(data[i:i + SAMPLE_SIZE]) for i in range(0, len(data), SAMPLE_SIZE)]
+        assert list(read_samples(tmp_path)) == expected
+
+    def test_resume_matches_uninterrupted_run(self, tmp_path):
+        games = self._games(5)
+        self._write(tmp_path / 'full', games).close()
+
+        # Interrupted after 3 games: the writer is never closed
+        self._write(tmp_path / 'resumed', games[:3])
+        writer = ShardWriter(tmp_path / 'resumed', self.SHARD_SIZE, {'seed': 0})
+        assert writer.games_done == 2  # Only the first, closed shard counts
+        for game_index in range(2, 5):
+            writer.write_game(game_index, games[game_index])
+        writer.close()
+
+        assert self._shards(tmp_path / 'resumed') == self._shards(tmp_path / 'full')
+
+    def test_engine_policy(self):
+        data = play_game(0, seed=0, policy='engine', max_moves=4)
+        samples = [decode_sample(data[i:i + SAMPLE_SIZE]) for i in range(0, len(data), SAMPLE_SIZE)]
+        assert len(samples) == 4
+        assert [side for board, side, move, outcome in samples] == [0, 1, 0, 1]
+
+    def test_resume_with_different_params(self, tmp_path):
+        self._write(tmp_path, self._games(3)).close()
+        with pytest.raises(ValueError):
+            ShardWriter(tmp_path, self.SHARD_SIZE, {'seed': 1})
+
+class TestTrace:
+    @pytest.fixture
+    def shard(self, tmp_path):
+        pytest.importorskip('chess')
+        plies = record_shard(tmp_path, 0, num_games=2, max_moves=20)
+        return tmp_path / 'trace-00000.bin', plies
+
+    def test_record_replay_round_trip(self, shard):
+        path, plies = shard
+        assert replay_shard(path) == (2, plies, None)
+
+    def test_record_leaves_global_random_alone(self, tmp_path):
+        pytest.importorskip('chess')
+        state = random.getstate()
+        record_shard(tmp_path, 0, num_games=1, max_moves=5)
+        assert random.getstate() == state
+
+    def test_record_corpus_rejects_bad_shards_and_stale_traces(self, tmp_path):
+        pytest.importorskip('chess')
+        with pytest.raises(ValueError):
+            record_corpus(tmp_path, 2, shards=0)
+        record_corpus(tmp_path, 2, shards=2, max_moves=5, workers=1)
+        with pytest.raises(ValueError):
+            record_corpus(tmp_path, 1, shards=1, max_moves=5, workers=1)
+        record_corpus(tmp_path, 1, shards=1, max_moves=5, workers=1, overwrite=True)
+        assert [path.name for path in tmp_path.glob('trace-*.bin')] == ['trace-00000.bin']
+
+    def test_replay_reports_hash_mismatch(self, shard):
+        path, plies = shard
+        data = bytearray(path.read_bytes())
+        # Last byte of the first ply's position hash
+        data[len(MAGIC) + GAME_HEADER.size + PLY.size - 1] ^= 0xff
+        path.write_bytes(bytes(data))
+
+        games, replayed, error = replay_shard(path)
+        assert (games, replayed) == (0, 0)
+        assert 'mismatch' in error
+
+    def test_replay_reports_truncated_shard(self, shard):
+        path, plies = shard
+        path.write_bytes(path.read_bytes()[:-3])
+
+        games, replayed, error = replay_shard(path)
+        assert games == 1
+        assert 'truncated' in error
+
+class TestValidator:
+    def test_legal_move_sets_match_reports_differences(self):
+        pytest.importorskip('chess')
+        from chess_validator import ChessValidator
+
+        class WrongMovesChess(Chess):
+            def get_all_valid_moves(self):
+                moves = [move for move in super().get_all_valid_moves() if move != ((6, 4), (4, 4))]
+                return moves + [((6, 4), (3, 4))]
+
+        validator = ChessValidator(check_legal_moves=True)
+        assert validator._legal_move_sets_match() == (True, "")
+
+        validator.our_board = WrongMovesChess()
+        match_result, error_msg = validator._legal_move_sets_match()
+        assert not match_result
+        assert "Wrongly allowed: ['e2e5']" in error_msg
+        assert "Missing: ['e2e4']" in error_msg
+
+class TestUCI:
+    def test_game_from_fen(self):
+        game = game_from_fen('rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3')
+        assert game.get_current_player() == 'black'
+        assert game.get_piece((4, 3)) == ('black', 'p')
+        assert (5, 4) in game.get_valid_moves((4, 3))  # En passant from the FEN
+
+    @pytest.mark.parametrize('placement', ['9/8/8/8/8/8/8/8', '44/8/8/8/8/8/8/8',
+                                           '7/8/8/8/8/8/8/8', 'k8/8/8/8/8/8/8/8'])
+    def test_game_from_fen_rejects_bad_rank(self, placement):
+        with pytest.raises(ValueError):
+            game_from_fen(placement + ' w - - 0 1')
+
+    def test_ponderhit_reports_whole_search(self, monkeypatch):
+        clock = [100.0]
+        monkeypatch.setattr(chess_uci.time, 'monotonic', lambda: clock[0])
+        lines = []
+        searcher = Searcher(Chess(), SearchLimits(depth=1, ponder=True), threading.Event(), lines.append)
+        search_root = searcher._search_root
+
+        def ponderhit_after_one_second(moves, depth):
+            clock[0] += 1.0
+            searcher.limits.ponder = False
+            searcher.start_clock()
+            return search_root(moves, depth)
+        searcher._search_root = ponderhit_after_one_second
+        searcher.search()
+
+        info = lines[-1].split()
+        assert int(info[info.index('time') + 1]) == 1000
+        assert int(info[info.index('nps') + 1]) == int(info[info.index('nodes') + 1])
+
+    def test_position_rejects_underpromotion(self):
+        lines = []
+        engine = UCIEngine(output=lines.append)
+        engine.handle('position fen 8/4P3/8/8/8/8/k7/7K w - - 0 1 moves e7e8n a2a1')
+        assert lines == ['info string Unsupported underpromotion: e7e8n']
+        assert engine.position_moves == []
+        assert engine.game.get_piece((1, 4)) == ('white', 'p')
+
+        engine.handle('position fen 8/4P3/8/8/8/8/k7/7K w - - 0 1 moves e7e8q a2a1')
+        assert engine.game.get_piece((0, 4)) == ('white', 'q')
+
+    def test_search_error_still_sends_bestmove(self, monkeypatch):
+        def broken_search(self):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(Searcher, 'search', broken_search)
+        lines = []
+        engine = UCIEngine(output=lines.append)
+        engine.handle('go depth 1')
+        engine.search_thread.join()
+        assert lines == ['info string Search failed: boom', 'bestmove 0000']
+
+    def test_position_applies_new_moves_only(self):
+        engine = UCIEngine(output=lambda line: None)
+        engine.handle('position startpos moves e2e4')
+        game = engine.game
+        engine.handle('position startpos moves e2e4 e7e5')
+        assert engine.game is game
+        assert engine.game.get_piece((3, 4)) == ('black', 'p')
+        engine.handle('position startpos moves d2d4')
+        assert engine.game.get_piece((4, 3)) == ('white', 'p')
+        assert (4, 4) not in engine.game.get_board()
+
+    def test_go_finds_mate(self):
+        lines = []
+        engine = UCIEngine(output=lines.append)
+        engine.handle('position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+        engine.handle('go depth 2')
+        engine.search_thread.join()
+        assert lines[-1] == 'bestmove a1a8'
+        assert any(' nodes ' in line and ' nps ' in line for line in lines)
+
+class TestBenchmark:
+    def _results(self, **medians):
+        return {'results': {'python': {name: {'median': value, 'min': value}
+                                       for name, value in medians.items()}}}
+
+    def test_compare_flags_regressions(self):
+        baseline = self._results(make_move=100e-6, get_board=1e-6)
+        current = self._results(make_move=105e-6, get_board=1.5e-6)
+        regressions, missing = compare_results(baseline, current, threshold=0.10)
+        assert [(backend, name) for backend, name, change in regressions] == [('python', 'get_board')]
+        assert missing == []
+
+    def test_compare_reports_missing_benchmarks(self):
+        baseline = self._results(make_move=100e-6, random_game=0.1)
+        current = self._results(make_move=100e-6)
+        regressions, missing = compare_results(baseline, current)
+        assert regressions == []
+        assert missing == [('python', 'random_game')]
+
+    def test_validate_workload(self):
+        sequences = make_workload(num_games=2, max_moves=10)
+        assert validate_workload(Chess, sequences) is None
+
+        class RejectingChess(Chess):
+            def make_move(self, from_pos, to_pos):
+                return False
+        assert 'rejected' in validate_workload(RejectingChess, sequences)
+
+    def test_legal_moves_order_is_backend_independent(self):
+        class ReversedChess(Chess):
+            def get_valid_moves(self, pos):
+                return list(reversed(super().get_valid_moves(pos)))
+        assert _legal_moves(ReversedChess()) == _legal_moves(Chess())
+
+    def test_random_game_plays_the_workload(self):
+        random_games = make_workload(seed=1, num_games=2, max_moves=10)
+        benchmark = BackendBenchmark(Chess, random_games, random_games)
+        elapsed, ops = benchmark.bench_random_game()
+        assert ops == 2
+
+    def test_micro_benchmark_sample_length(self):
+        sequences = make_workload(num_games=2, max_moves=10)
+        benchmark = BackendBenchmark(Chess, sequences, sequences)
+        elapsed, ops = benchmark.bench_get_board()
+        assert elapsed >= 0.005
+        assert benchmark.bench_get_board()[1] == ops  # Loop count stays fixed once calibrated
@@ -0,0 +1,292 @@
+import argparse
+import hashlib
+import importlib
+import os
+import random
+import struct
+import time
+from multiprocessing import Pool
+from chess_game import encode_board, unpack_move
+
+# python-chess is only needed to record a corpus; replay runs without it.
+#
+# Trace file layout: MAGIC, then per game a GAME_HEADER (ply count, result)
+# followed by one PLY record per move: packed move, legal move count of the
+# resulting position and a 64-bit hash of the resulting position.
+MAGIC = b'CHTR\x02'
+GAME_HEADER = struct.Struct('<HB')
+PLY = struct.Struct('<HBQ')
+
+RESULTS = {None: 0, 'checkmate': 1, 'stalemate': 2}
+RESULT_NAMES = {code: name for name, code in RESULTS.items()}
+
+
+def position_hash(board, current_player, castling_rights, en_passant_file=None):
+    """64-bit hash of a position: board, side to move, castling rights and en passant file.
+
+    Castling rights only count while the king and rook are still on their
+    home squares, which is how the chess library reports them.
+    """
+    castling = 0
+    for bit, (color, side, row, rook_col) in enumerate([('white', 'kingside', 7, 7), ('white', 'queenside', 7, 0),
+                                                         ('black', 'kingside', 0, 7), ('black', 'queenside', 0, 0)]):
+        if (castling_rights[color][side] and board.get((row, 4)) == (color, 'k')
+                and board.get((row, rook_col)) == (color, 'r')):
+            castling |= 1 << bit
+    state = bytes([0 if current_player == 'white' else 1, castling,
+                   8 if en_passant_file is None else en_passant_file])
+    digest = hashlib.blake2b(encode_board(board) + state, digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _backend_hash(game):
+    """position_hash of a backend game, en passant taken from its last double pawn move"""
+    last_move = game.get_last_move()
+    en_passant_file = None
+    if last_move and last_move[1] == 'p' and abs(last_move[2][0] - last_move[3][0]) == 2:
+        en_passant_file = last_move[3][1]
+    return position_hash(game.get_board(), game.get_current_player(),
+                         game.get_castling_rights(), en_passant_file)
+
+
+def _shard_path(corpus_dir, shard):
+    return os.path.join(corpus_dir, f"trace-{shard:05d}.bin")
+
+
+def _shard_paths(corpus_dir):
+    return sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir)
+                  if name.startswith('trace-') and name.endswith('.bin'))
+
+
+def _oracle_state(official_board):
+    """Position hash and queen-only legal move count of a python-chess board"""
+    import chess
+    board = {}
+    for square, piece in official_board.piece_map().items():
+        color = 'white' if piece.color == chess.WHITE else 'black'
+        board[(7 - chess.square_rank(square), chess.square_file(square))] = (color, piece.symbol().lower())
+    current_player = 'white' if official_board.turn == chess.WHITE else 'black'
+    castling_rights = {
+        color: {'kingside': official_board.has_kingside_castling_rights(turn),
+                'queenside': official_board.has_queenside_castling_rights(turn)}
+        for color, turn in (('white', chess.WHITE), ('black', chess.BLACK))
+    }
+    # The chess library sets ep_square after every double pawn move
+    en_passant_file = None if official_board.ep_square is None else chess.square_file(official_board.ep_square)
+    state_hash = position_hash(board, current_player, castling_rights, en_passant_file)
+    # Our implementation always promotes to a queen, so promotions collapse
+    legal_moves = {(m.from_square, m.to_square) for m in official_board.legal_moves}
+    return state_hash, len(legal_moves)
+
+
+def record_shard(corpus_dir, shard, num_games, max_moves=200, seed=0):
+    """Record num_games random oracle games into one trace shard"""
+    import chess
+    from chess_validator import ChessValidator
+    rng = random.Random(seed * 1000003 + shard)
+    # The validator's board has the rules we don't implement disabled
+    official_board = ChessValidator().official_board
+    plies = 0
+
+    with open(_shard_path(corpus_dir, shard), 'wb') as file:
+        file.write(MAGIC)
+        for _ in range(num_games):
+            official_board.reset()
+            records = []
+            result = None
+            for _ in range(max_moves):
+                # We always promote to a queen, so underpromotions are never played
+                legal_moves = [m for m in official_board.legal_moves if m.promotion in (None, chess.QUEEN)]
+                if not legal_moves:
+                    break
+                move = rng.choice(legal_moves)
+                official_board.push(move)
+                state_hash, legal_count = _oracle_state(official_board)
+                # square ^ 56 flips the rank, giving our row * 8 + col index
+                packed_move = (move.from_square ^ 56) * 64 + (move.to_square ^ 56)
+                records.append(PLY.pack(packed_move, legal_count, state_hash))
+                if official_board.is_game_over():
+                    result = 'checkmate' if official_board.is_checkmate() else 'stalemate'
+                    break
+            file.write(GAME_HEADER.pack(len(records), RESULTS[result]))
+            file.write(b''.join(records))
+            plies += len(records)
+    return plies
+
+
+def read_traces(path):
+    """Stream (moves, legal_counts, hashes, result) per game from a trace shard"""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        while True:
+            header = file.read(GAME_HEADER.size)
+            if len(header) < GAME_HEADER.size:
+                return
+            num_plies, result = GAME_HEADER.unpack(header)
+            data = file.read(num_plies * PLY.size)
+            if len(data) < num_plies * PLY.size or result not in RESULT_NAMES:
+                raise ValueError(f"{path} is truncated or corrupt")
+            moves, legal_counts, hashes = [], [], []
+            for move, legal_count, state_hash in PLY.iter_unpack(data):
+                moves.append(move)
+                legal_counts.append(legal_count)
+                hashes.append(state_hash)
+            yield moves, legal_counts, hashes, RESULT_NAMES[result]
+
+
+def _count_legal_moves(game):
+    current_player = game.get_current_player()
+    return len({(pos, to_pos) for pos, piece in list(game.get_board().items())
+                if piece[0] == current_player
+                for to_pos in game.get_valid_moves(pos)})
+
+
+def replay_shard(path, backend='chess_game', check_moves=True):
+    """Replay a trace shard against a Chess backend.
+
+    Returns (games, plies, error) where error is None on success or a
+    description of the first mismatch.
+    """
+    Chess = importlib.import_module(backend).Chess
+    games = plies = 0
+    traces = read_traces(path)
+
+    while True:
+        try:
+            moves, legal_counts, hashes, result = next(traces)
+        except StopIteration:
+            break
+        except ValueError as e:
+            return games, plies, str(e)
+        game = Chess()
+        for ply, move in enumerate(moves):
+            from_square, to_square = unpack_move(move)
+            where = f"{os.path.basename(path)} game {games + 1} move {ply + 1}"
+            if not game.make_move(from_square, to_square):
+                return games, plies, f"Move validation failed in {where}"
+            if _backend_hash(game) != hashes[ply]:
+                return games, plies, f"Position mismatch in {where}"
+
+            expected_game_over = ply == len(moves) - 1 and result is not None
+            if check_moves:
+                legal_count = _count_legal_moves(game)
+                if legal_count != legal_counts[ply]:
+                    return games, plies, (f"Legal move count mismatch in {where}: "
+                                          f"Official: {legal_counts[ply]}, Ours: {legal_count}")
+                our_game_over = legal_count == 0
+            else:
+                our_game_over = bool(game.is_game_over())
+            if our_game_over != expected_game_over:
+                return games, plies, f"Game state mismatch in {where}"
+            plies += 1
+
+        if result is not None and game.is_game_over() != result:
+            return games, plies, (f"Outcome mismatch in {os.path.basename(path)} game {games + 1}: "
+                                  f"Official: {result}, Ours: {game.is_game_over()}")
+        games += 1
+    return games, plies, None
+
+
+def _record_task(args):
+    return record_shard(*args)
+
+
+def _replay_task(args):
+    return replay_shard(*args)
+
+
+def record_corpus(corpus_dir, num_games, shards=1, max_moves=200, seed=0, workers=None,
+                  overwrite=False):
+    """Record num_games oracle games spread over shards trace files.
+
+    Raises ValueError for fewer than one shard, or when corpus_dir already
+    holds trace shards and overwrite is not set; with overwrite they are
+    deleted first so no stale shard is replayed with the new corpus.
+    """
+    if shards < 1:
+        raise ValueError(f"Need at least one shard, got {shards}")
+    os.makedirs(corpus_dir, exist_ok=True)
+    existing = _shard_paths(corpus_dir)
+    if existing and not overwrite:
+        raise ValueError(f"{corpus_dir} already contains {len(existing)} trace shard(s), "
+                         f"use --overwrite to replace them")
+    for path in existing:
+        os.remove(path)
+    start_time = time.time()
+    tasks = [(corpus_dir, shard, num_games // shards + (shard < num_games % shards), max_moves, seed)
+             for shard in range(shards)]
+    with Pool(workers) as pool:
+        plies = sum(pool.map(_record_task, tasks))
+    duration = time.time() - start_time
+
+    print(f"\nRecording completed!")
+    print(f"Games recorded: {num_games}")
+    print(f"Total moves: {plies}")
+    print(f"Time taken: {duration:.2f} seconds")
+
+
+def replay_corpus(corpus_dir, backend='chess_game', check_moves=True, workers=None):
+    """Replay every trace shard in corpus_dir, in parallel across shards"""
+    paths = _shard_paths(corpus_dir)
+    if not paths:
+        print(f"No trace shards found in {corpus_dir}")
+        return False
+    start_time = time.time()
+    total_games = total_moves = 0
+    ok = True
+
+    with Pool(workers) as pool:
+        for games, plies, error in pool.imap_unordered(
+                _replay_task, [(path, backend, check_moves) for path in paths]):
+            total_games += games
+            total_moves += plies
+            if error:
+                print(error)
+                ok = False
+    duration = time.time() - start_time
+
+    print(f"\nReplay {'completed successfully!' if ok else 'failed!'}")
+    print(f"Shards: {len(paths)}")
+    print(f"Games replayed: {total_games}")
+    print(f"Total moves: {total_moves}")
+    print(f"Time taken: {duration:.2f} seconds")
+    print(f"Moves per second: {total_moves/max(duration, 1e-9):.1f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay golden trace corpora")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help="record oracle games with python-chess")
+    record.add_argument('corpus_dir')
+    record.add_argument('--games', type=int, default=100)
+    record.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    record.add_argument('--max-moves', type=int, default=200)
+    record.add_argument('--seed', type=int, default=0)
+    record.add_argument('--workers', type=int, default=None)
+    record.add_argument('--overwrite', action='store_true',
+                        help="delete trace shards already in corpus_dir")
+
+    replay = subparsers.add_parser('replay', help="check an implementation against a corpus")
+    replay.add_argument('corpus_dir')
+    replay.add_argument('--backend', default='chess_game',
+                        help="module providing Chess, e.g. chess_game_from_lua")
+    replay.add_argument('--skip-moves', action='store_true',
+                        help="don't compare legal move counts")
+    replay.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        try:
+            record_corpus(args.corpus_dir, args.games, args.shards, args.max_moves,
+                          args.seed, args.workers, args.overwrite)
+        except ValueError as e:
+            print(e)
+            raise SystemExit(1)
+    elif not replay_corpus(args.corpus_dir, args.backend, not args.skip_moves, args.workers):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
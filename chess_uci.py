@@ -0,0 +1,386 @@
+import sys
+import threading
+import time
+from chess_game import Chess
+
+PIECE_VALUES = {'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 0}
+MATE_SCORE = 100000
+
+
+class _SearchStopped(Exception):
+    """Raised inside the search when a limit is reached or stop was requested"""
+
+
+def square_to_pos(square):
+    """Convert a square name like 'e2' to our (row, col) position"""
+    if len(square) != 2 or square[0] not in 'abcdefgh' or square[1] not in '12345678':
+        raise ValueError(f"Invalid square: {square}")
+    return 8 - int(square[1]), ord(square[0]) - ord('a')
+
+
+def pos_to_square(pos):
+    return f"{chr(ord('a') + pos[1])}{8 - pos[0]}"
+
+
+def parse_uci_move(move):
+    """Convert a UCI move like 'e7e8q' to (from_pos, to_pos).
+
+    Our implementation always promotes to a queen, so any other promotion
+    raises ValueError rather than silently playing a different move.
+    """
+    if len(move) not in (4, 5):
+        raise ValueError(f"Invalid move: {move}")
+    if len(move) == 5 and move[4] != 'q':
+        if move[4] in 'nbr':
+            raise ValueError(f"Unsupported underpromotion: {move}")
+        raise ValueError(f"Invalid move: {move}")
+    return square_to_pos(move[0:2]), square_to_pos(move[2:4])
+
+
+def format_uci_move(game, from_pos, to_pos):
+    piece = game.get_board()[from_pos]
+    promotion = 'q' if piece[1] == 'p' and to_pos[0] in (0, 7) else ''
+    return pos_to_square(from_pos) + pos_to_square(to_pos) + promotion
+
+
+def game_from_fen(fen):
+    """Create a Chess game from a FEN string"""
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"Invalid FEN: {fen}")
+    placement, side, castling, en_passant = fields[:4]
+
+    game = Chess()
+    game.clear_board()
+    rows = placement.split('/')
+    if len(rows) != 8:
+        raise ValueError(f"Invalid FEN: {fen}")
+    for row, rank in enumerate(rows):
+        col = 0
+        previous = ''
+        for char in rank:
+            if char in '12345678':
+                if previous.isdigit():
+                    raise ValueError(f"Invalid FEN: {fen}")
+                col += int(char)
+            elif char.lower() in PIECE_VALUES and col < 8:
+                game.set_piece((row, col), ('white' if char.isupper() else 'black', char.lower()))
+                col += 1
+            else:
+                raise ValueError(f"Invalid FEN: {fen}")
+            if col > 8:
+                raise ValueError(f"Invalid FEN: {fen}")
+            previous = char
+        if col != 8:
+            raise ValueError(f"Invalid FEN: {fen}")
+
+    game.set_current_player('white' if side == 'w' else 'black')
+    game.castling_rights = {
+        'white': {'kingside': 'K' in castling, 'queenside': 'Q' in castling},
+        'black': {'kingside': 'k' in castling, 'queenside': 'q' in castling}
+    }
+    # Our implementation derives en passant from the last double pawn move
+    if en_passant != '-':
+        row, col = square_to_pos(en_passant)
+        if row == 5:
+            game.last_move = ('white', 'p', (6, col), (4, col))
+        elif row == 2:
+            game.last_move = ('black', 'p', (1, col), (3, col))
+    return game
+
+
+class SearchLimits:
+    def __init__(self, depth=None, nodes=None, movetime=None, wtime=None, btime=None,
+                 winc=0, binc=0, movestogo=None, infinite=False, ponder=False):
+        self.depth = depth
+        self.nodes = nodes
+        self.movetime = movetime
+        self.wtime = wtime
+        self.btime = btime
+        self.winc = winc
+        self.binc = binc
+        self.movestogo = movestogo
+        self.infinite = infinite
+        self.ponder = ponder
+
+    def time_budget(self, color):
+        """Seconds to spend on this move, or None for no time limit"""
+        if self.infinite:
+            return None
+        if self.movetime is not None:
+            return self.movetime / 1000
+        remaining = self.wtime if color == 'white' else self.btime
+        if remaining is None:
+            return None
+        increment = self.winc if color == 'white' else self.binc
+        budget = remaining / (self.movestogo or 30) + increment * 0.5
+        # Keep a safety margin for communication overhead
+        return max(0.01, min(budget, remaining * 0.5 - 50) / 1000)
+
+
+class Searcher:
+    """Iterative deepening alpha-beta search over material"""
+
+    def __init__(self, game, limits, stop_event, info=None):
+        self.game = game
+        self.limits = limits
+        self.stop_event = stop_event
+        self.info = info or (lambda line: None)
+        self.nodes = 0
+        self.deadline = None
+        # Reported time and nps cover the whole search, including pondering
+        self.search_start = None
+
+    def start_clock(self):
+        """Start the time budget, called again on ponderhit"""
+        budget = None if self.limits.ponder else self.limits.time_budget(self.game.get_current_player())
+        self.deadline = None if budget is None else time.monotonic() + budget
+
+    def _should_stop(self):
+        if self.stop_event.is_set():
+            return True
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _evaluate(self, game):
+        score = 0
+        for color, piece in game.get_board().values():
+            score += PIECE_VALUES[piece] if color == game.current_player else -PIECE_VALUES[piece]
+        return score
+
+    def _ordered_moves(self, game):
+        board = game.get_board()
+        moves = game.get_all_valid_moves()
+        # Captures first, most valuable victim first
+        moves.sort(key=lambda move: -PIECE_VALUES[board[move[1]][1]] if move[1] in board else 0)
+        return moves
+
+    def _negamax(self, game, depth, ply, alpha, beta):
+        self.nodes += 1
+        # Leaves skip move generation, mates are found one ply earlier
+        if depth == 0:
+            return self._evaluate(game)
+        moves = self._ordered_moves(game)
+        if not moves:
+            return -MATE_SCORE + ply if game._is_check(game.current_player) else 0
+
+        for from_pos, to_pos in moves:
+            if self._should_stop():
+                raise _SearchStopped
+            child = game.copy()
+            child._apply_move(from_pos, to_pos)
+            score = -self._negamax(child, depth - 1, ply + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _search_root(self, moves, depth):
+        best_move, best_score = None, -MATE_SCORE - 1
+        alpha = -MATE_SCORE - 1
+        for from_pos, to_pos in moves:
+            child = self.game.copy()
+            child._apply_move(from_pos, to_pos)
+            score = -self._negamax(child, depth - 1, 1, -MATE_SCORE - 1, -alpha)
+            if score > best_score:
+                best_move, best_score = (from_pos, to_pos), score
+            alpha = max(alpha, score)
+        return best_move, best_score
+
+    def search(self):
+        """Return the best move found within the limits, or None if there are no legal moves"""
+        self.search_start = time.monotonic()
+        self.start_clock()
+        moves = self._ordered_moves(self.game)
+        if not moves:
+            return None
+        best_move = moves[0]
+        depth = 0
+        while self.limits.depth is None or depth < self.limits.depth:
+            depth += 1
+            try:
+                move, score = self._search_root(moves, depth)
+            except _SearchStopped:
+                break
+            best_move = move
+            # Search the previous best move first at the next depth
+            moves.remove(move)
+            moves.insert(0, move)
+            self._report(depth, score, best_move)
+            if abs(score) >= MATE_SCORE - 1000:
+                break
+        return best_move
+
+    def _report(self, depth, score, best_move):
+        elapsed = max(time.monotonic() - self.search_start, 1e-6)
+        if abs(score) >= MATE_SCORE - 1000:
+            plies = MATE_SCORE - abs(score)
+            score_text = f"mate {(plies + 1) // 2 if score > 0 else -(plies // 2)}"
+        else:
+            score_text = f"cp {score}"
+        self.info(f"info depth {depth} score {score_text} nodes {self.nodes} "
+                  f"nps {int(self.nodes / elapsed)} time {int(elapsed * 1000)} "
+                  f"pv {format_uci_move(self.game, *best_move)}")
+
+
+class UCIEngine:
+    """UCI protocol front-end; searches run in a background thread"""
+
+    def __init__(self, output=None):
+        self.output = output or self._print
+        self.output_lock = threading.Lock()
+        self.game = Chess()
+        self.position_base = 'startpos'
+        self.position_moves = []
+        self.search_thread = None
+        self.searcher = None
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event()
+
+    def _print(self, line):
+        print(line, flush=True)
+
+    def send(self, line):
+        with self.output_lock:
+            self.output(line)
+
+    def handle(self, line):
+        """Handle one command line, returns False on quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self.send("id name Luman Chess")
+            self.send("id author Luman")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop()
+            self.game = Chess()
+            self.position_base = 'startpos'
+            self.position_moves = []
+        elif command == 'position':
+            self.stop()
+            self.set_position(args)
+        elif command == 'go':
+            self.stop()
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            self.stop()
+            return False
+        return True
+
+    def set_position(self, args):
+        """Handle 'position startpos|fen <fen> [moves ...]' applying only new moves when possible"""
+        if 'moves' in args:
+            index = args.index('moves')
+            base_args, moves = args[:index], args[index + 1:]
+        else:
+            base_args, moves = args, []
+        if base_args[:1] == ['startpos']:
+            base = 'startpos'
+        elif base_args[:1] == ['fen']:
+            base = ' '.join(base_args[1:])
+        else:
+            return
+
+        # GUIs resend the whole game each move, so only apply the new suffix
+        if base != self.position_base or moves[:len(self.position_moves)] != self.position_moves:
+            try:
+                self.game = Chess() if base == 'startpos' else game_from_fen(base)
+            except ValueError as e:
+                self.send(f"info string {e}")
+                return
+            self.position_base = base
+            self.position_moves = []
+
+        for move in moves[len(self.position_moves):]:
+            try:
+                from_pos, to_pos = parse_uci_move(move)
+            except ValueError as e:
+                self.send(f"info string {e}")
+                return
+            if not self.game.make_move(from_pos, to_pos):
+                self.send(f"info string Illegal move: {move}")
+                return
+            self.position_moves.append(move)
+
+    def _parse_limits(self, args):
+        limits = SearchLimits()
+        int_options = ('depth', 'nodes', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo')
+        i = 0
+        while i < len(args):
+            if args[i] in int_options and i + 1 < len(args):
+                setattr(limits, args[i], int(args[i + 1]))
+                i += 2
+                continue
+            if args[i] == 'infinite':
+                limits.infinite = True
+            elif args[i] == 'ponder':
+                limits.ponder = True
+            i += 1
+        return limits
+
+    def go(self, args):
+        try:
+            limits = self._parse_limits(args)
+        except ValueError:
+            self.send("info string Invalid go command")
+            return
+        self.stop_event.clear()
+        self.ponderhit_event.clear()
+        self.searcher = Searcher(self.game.copy(), limits, self.stop_event, self.send)
+        self.search_thread = threading.Thread(target=self._search, daemon=True)
+        self.search_thread.start()
+
+    def _search(self):
+        searcher = self.searcher
+        best_move = None
+        try:
+            best_move = searcher.search()
+            # UCI forbids sending bestmove while pondering or in infinite mode until told
+            while (searcher.limits.infinite or searcher.limits.ponder) and not self.stop_event.is_set():
+                if self.ponderhit_event.wait(0.01):
+                    break
+        except Exception as e:
+            self.send(f"info string Search failed: {e}")
+        finally:
+            # The GUI waits for bestmove, so it is always sent
+            if best_move is None:
+                self.send("bestmove 0000")
+            else:
+                self.send(f"bestmove {format_uci_move(searcher.game, *best_move)}")
+
+    def ponderhit(self):
+        searcher = self.searcher
+        if searcher is None or not searcher.limits.ponder:
+            return
+        # The predicted move was played, keep searching on our own clock
+        searcher.limits.ponder = False
+        searcher.start_clock()
+        self.ponderhit_event.set()
+
+    def stop(self):
+        """Stop a running search and wait for its bestmove"""
+        if self.search_thread is not None:
+            self.stop_event.set()
+            self.search_thread.join()
+            self.search_thread = None
+            self.searcher = None
+
+    def run(self, stream=None):
+        for line in stream or sys.stdin:
+            if not self.handle(line):
+                break
+        self.stop()
+
+if __name__ == "__main__":
+    UCIEngine().run()
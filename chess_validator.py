@@ -1,11 +1,12 @@
+import argparse
 import chess
 import random
 import time
-from chess_game import Chess
+from chess_game import Chess, pack_move
 import traceback
 
 class ChessValidator:
-    def __init__(self):
+    def __init__(self, check_legal_moves=False):
         self.official_board = chess.Board()
         
         # Disable rules in official board that not implemented in our board
@@ -22,6 +23,7 @@ class ChessValidator:
         
         self.our_board = Chess()
         self.move_history = []
+        self.check_legal_moves = check_legal_moves
         
     def _convert_official_move_to_ours(self, move):
         """Convert chess library move to our format"""
@@ -85,6 +87,30 @@ class ChessValidator:
         except Exception as e:
             return False, f"Error comparing boards: {traceback.format_exc()}"
     
+    def _official_legal_move_set(self):
+        """Legal moves of the official board as packed move integers"""
+        # Flipping the rank (square ^ 56) maps a chess library square to our
+        # row * 8 + col index. Promotions collapse as we always promote to a queen.
+        return {(m.from_square ^ 56) * 64 + (m.to_square ^ 56)
+                for m in self.official_board.legal_moves}
+
+    def _our_legal_move_set(self):
+        """Legal moves of our board as packed move integers"""
+        return {pack_move(from_pos, to_pos) for from_pos, to_pos in self.our_board.get_all_valid_moves()}
+
+    def _legal_move_sets_match(self):
+        """Compare full legal move sets between implementations"""
+        official_moves = self._official_legal_move_set()
+        our_moves = self._our_legal_move_set()
+        if official_moves == our_moves:
+            return True, ""
+
+        def names(moves):
+            return sorted(chess.square_name((move // 64) ^ 56) + chess.square_name((move % 64) ^ 56)
+                          for move in moves)
+        return False, (f"Legal moves mismatch: Wrongly allowed: {names(our_moves - official_moves)}, "
+                       f"Missing: {names(official_moves - our_moves)}")
+
     def _print_comparison(self):
         """Print both boards side by side for visual comparison"""
         print("\nOfficial Chess Library Board:")
@@ -102,6 +128,7 @@ class ChessValidator:
         """Run multiple random games to validate implementations"""
         games_completed = 0
         total_moves = 0
+        positions_checked = 0
         start_time = time.time()
         
         try:
@@ -110,6 +137,15 @@ class ChessValidator:
                 self.official_board.reset()
                 self.our_board = Chess()
                 self.move_history = []
+
+                if self.check_legal_moves:
+                    match_result, error_msg = self._legal_move_sets_match()
+                    if not match_result:
+                        print("Legal moves mismatch in initial position")
+                        print(error_msg)
+                        self._print_comparison()
+                        return False
+                    positions_checked += 1
                 
                 for move_num in range(max_moves):
                     if move_num % 100 == 0:
@@ -122,7 +158,6 @@ class ChessValidator:
                     if move is None or self.official_board.is_game_over():
                         print(f"Game {game_num + 1} completed after {move_num} moves")
                         games_completed += 1
-                        total_moves += move_num
                         break
                     
                     try:
@@ -141,6 +176,8 @@ class ChessValidator:
                             print(f"Move validation failed on move {move_num + 1}")
                             self._print_comparison()
                             return False
+                        # Count every ply played, like positions_checked
+                        total_moves += 1
                         
                         # Validate board state
                         match_result, error_msg = self._board_states_match()
@@ -149,6 +186,16 @@ class ChessValidator:
                             print(error_msg)
                             self._print_comparison()
                             return False
+
+                        # Validate full legal move set
+                        if self.check_legal_moves:
+                            match_result, error_msg = self._legal_move_sets_match()
+                            if not match_result:
+                                print(f"Legal moves mismatch on move {move_num + 1}")
+                                print(error_msg)
+                                self._print_comparison()
+                                return False
+                            positions_checked += 1
                         
                         # Validate game state
                         official_game_over = self.official_board.is_game_over()
@@ -181,10 +228,18 @@ class ChessValidator:
         print(f"Average moves per game: {total_moves/num_games:.1f}")
         print(f"Time taken: {duration:.2f} seconds")
         print(f"Moves per second: {total_moves/duration:.1f}")
+        if self.check_legal_moves:
+            print(f"Positions checked: {positions_checked}")
+            print(f"Positions per second: {positions_checked/duration:.1f}")
         return True
     
 def main():
-    validator = ChessValidator()
+    parser = argparse.ArgumentParser(description="Validate our implementation against the chess library")
+    parser.add_argument('--legal-moves', action='store_true',
+                        help="compare the full legal move set at every position")
+    args = parser.parse_args()
+
+    validator = ChessValidator(check_legal_moves=args.legal_moves)
     
     print("Starting chess implementation validation...")
     print("This will run multiple random games comparing our implementation")